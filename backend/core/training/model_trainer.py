@@ -1,26 +1,46 @@
 import asyncio
+import bisect
 import json
 import logging
+import os
 import pickle
 import time
+import warnings
+import weakref
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple, Union
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple, Union, AsyncGenerator, Callable, Set
+from dataclasses import dataclass, asdict, field
+from collections import OrderedDict, defaultdict
 from enum import Enum
 import aiohttp
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, HistGradientBoostingClassifier
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import StandardScaler
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import make_pipeline
 from sklearn.cluster import KMeans
 from letta import LettaClient
 from litellm import completion
 import joblib
 import hashlib
+import secrets
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when numba is not installed"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +60,74 @@ class TrainingStatus(Enum):
     FAILED = "failed"
     VALIDATING = "validating"
 
+# Histogram gradient boosting models are scale-invariant and require dense input
+HIST_GBDT_MODEL_TYPES = {
+    ModelType.QUALITY_PREDICTOR,
+    ModelType.PRICE_PREDICTOR,
+    ModelType.CATEGORY_CLASSIFIER
+}
+
+# Supported rule-based modifier condition operators
+RULE_OPERATORS = {"equals", "contains", "greater_than", "less_than", "in"}
+
+# Operators that compare against the item value coerced to str, done once per item and field
+TEXT_RULE_OPERATORS = {"contains"}
+
+# Numeric codes for rule tables; rules using other operators stay on the closure path
+RULE_OP_CODES = {"equals": 0, "greater_than": 1, "less_than": 2}
+RULE_ACTION_CODES = {"add": 0, "multiply": 1, "set": 2}
+@njit(cache=True)
+def _apply_rule_table_jit(quality, field_values, op_codes, action_codes, field_ids, condition_values, action_values):
+    """Apply a numeric rule table to a batch of qualities in native code"""
+    result = quality.copy()
+    
+    for j in range(result.shape[0]):
+        q = result[j]
+        for i in range(op_codes.shape[0]):
+            # Missing or non-numeric item values are NaN and never match
+            v = field_values[j, field_ids[i]]
+            if op_codes[i] == 0:
+                matched = v == condition_values[i]
+            elif op_codes[i] == 1:
+                matched = v > condition_values[i]
+            else:
+                matched = v < condition_values[i]
+            
+            if matched:
+                if action_codes[i] == 0:
+                    q += action_values[i]
+                elif action_codes[i] == 1:
+                    q *= action_values[i]
+                else:
+                    q = action_values[i]
+        result[j] = q
+    
+    return result
+
+def _apply_rule_table_vectorized(quality, field_values, op_codes, action_codes, field_ids, condition_values, action_values):
+    """Apply a numeric rule table to a batch of qualities, one NumPy pass per rule"""
+    result = quality.copy()
+    
+    for i in range(len(op_codes)):
+        v = field_values[:, field_ids[i]]
+        if op_codes[i] == 0:
+            matched = v == condition_values[i]
+        elif op_codes[i] == 1:
+            matched = v > condition_values[i]
+        else:
+            matched = v < condition_values[i]
+        
+        if action_codes[i] == 0:
+            result[matched] += action_values[i]
+        elif action_codes[i] == 1:
+            result[matched] *= action_values[i]
+        else:
+            result[matched] = action_values[i]
+    
+    return result
+
+apply_rule_table = _apply_rule_table_jit if NUMBA_AVAILABLE else _apply_rule_table_vectorized
+
 @dataclass
 class TrainingConfig:
     model_type: ModelType
@@ -55,21 +143,30 @@ class TrainingConfig:
     use_numerical_features: bool = True
     max_features: int = 1000
     model_params: Dict[str, Any] = None
+    columns: List[str] = None  # Columns to load for training; None loads every column
 
 @dataclass
 class TrainingMetrics:
-    accuracy: float
-    precision: float
-    recall: float
-    f1_score: float
-    rmse: float
-    mae: float
-    r2_score: float
-    cross_val_score: float
-    training_time: float
-    prediction_time: float
-    model_size: int
-    feature_importance: Dict[str, float]
+    # Classification and regression jobs each report only their own metrics; the rest stay None
+    accuracy: Optional[float] = None
+    precision: Optional[float] = None
+    recall: Optional[float] = None
+    f1_score: Optional[float] = None
+    rmse: Optional[float] = None
+    mae: Optional[float] = None
+    r2_score: Optional[float] = None
+    cross_val_score: Optional[float] = None
+    training_time: Optional[float] = None
+    prediction_time: Optional[float] = None
+    model_size: Optional[int] = None
+    feature_importance: Optional[Dict[str, float]] = None
+    validation_accuracy: Optional[float] = None
+    validation_precision: Optional[float] = None
+    validation_recall: Optional[float] = None
+    validation_f1: Optional[float] = None
+    validation_rmse: Optional[float] = None
+    validation_mae: Optional[float] = None
+    validation_r2: Optional[float] = None
 
 @dataclass
 class TrainingJob:
@@ -86,6 +183,16 @@ class TrainingJob:
     user_id: Optional[str]
     dataset_info: Dict[str, Any]
 
+@dataclass
+class RuleTable:
+    """Numeric rules of a rule-based modifier as parallel arrays"""
+    op_codes: np.ndarray
+    action_codes: np.ndarray
+    field_ids: np.ndarray
+    condition_values: np.ndarray
+    action_values: np.ndarray
+    fields: List[Tuple[str, bool]]  # (field name, exact numeric match) per field id
+
 @dataclass
 class QualityModifier:
     id: str
@@ -96,21 +203,115 @@ class QualityModifier:
     parameters: Dict[str, Any]
     confidence_threshold: float
     quality_improvement: float
-    is_active: bool = True
     created_at: datetime
     updated_at: datetime
+    is_active: bool = True
+    user_id: Optional[str] = None
+    # Compiled (predicate, action) pairs for rule-based modifiers, not persisted
+    _compiled_rules: Optional[List[Tuple[Callable, Callable]]] = field(default=None, repr=False, compare=False)
+    _text_fields: Tuple[str, ...] = field(default=(), repr=False, compare=False)
+    # Array form of the same rules when they are all numeric, not persisted
+    _rule_table: Optional[RuleTable] = field(default=None, repr=False, compare=False)
+
+class LRUCache(OrderedDict):
+    """Dict that evicts its least recently used entries beyond maxsize"""
+    
+    def __init__(self, maxsize: int = 16):
+        super().__init__()
+        self.maxsize = maxsize
+    
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+    
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+class MetricsTable:
+    """Struct-of-arrays store of completed job metrics for vectorized aggregation"""
+    
+    COLUMNS = ["accuracy", "precision", "recall", "f1_score", "rmse", "mae", "r2_score", "training_time"]
+    MODEL_TYPE_CODES = {model_type: code for code, model_type in enumerate(ModelType)}
+    
+    def __init__(self, capacity: int = 64):
+        self.size = 0
+        self.values = np.empty((capacity, len(self.COLUMNS)), dtype=np.float64)
+        self.completed_at = np.empty(capacity, dtype=np.float64)  # POSIX timestamps
+        self.model_types = np.empty(capacity, dtype=np.int8)
+        self.job_ids: List[str] = []
+    
+    def append(self, job_id: str, job: TrainingJob):
+        """Add a completed job's metrics as a new row"""
+        if self.size == len(self.completed_at):
+            # Grow geometrically so appends stay amortized O(1)
+            capacity = 2 * self.size
+            self.values = np.concatenate([self.values, np.empty_like(self.values)])[:capacity]
+            self.completed_at = np.concatenate([self.completed_at, np.empty_like(self.completed_at)])[:capacity]
+            self.model_types = np.concatenate([self.model_types, np.empty_like(self.model_types)])[:capacity]
+        
+        # Missing metrics are stored as NaN and skipped by the aggregation
+        values = [getattr(job.metrics, column, None) for column in self.COLUMNS]
+        self.values[self.size] = [np.nan if value is None else value for value in values]
+        self.completed_at[self.size] = job.completed_at.timestamp()
+        self.model_types[self.size] = self.MODEL_TYPE_CODES[job.model_type]
+        self.job_ids.append(job_id)
+        self.size += 1
+    
+    def rows(self, model_type: ModelType, completed_after: datetime) -> np.ndarray:
+        """Get row indices of a model type's jobs completed after a cutoff"""
+        n = self.size
+        mask = (self.model_types[:n] == self.MODEL_TYPE_CODES[model_type]) & (self.completed_at[:n] > completed_after.timestamp())
+        return np.flatnonzero(mask)
 
 class ModelTrainer:
     def __init__(self, supabase_client, letta_client: LettaClient):
         self.supabase = supabase_client
         self.letta = letta_client
         self.session: Optional[aiohttp.ClientSession] = None
-        self.models: Dict[str, Any] = {}
+        self.models: Dict[str, Any] = LRUCache(maxsize=16)  # Evicted models are reloaded from disk
         self.scalers: Dict[str, Any] = {}
         self.encoders: Dict[str, Any] = {}
         self.vectorizers: Dict[str, Any] = {}
+        self._feature_pipelines: Dict[ModelType, Callable[[List[Dict[str, Any]]], np.ndarray]] = {}
         self.training_jobs: Dict[str, TrainingJob] = {}
+        # Job ids per user and per current status
+        self._jobs_by_user: Dict[Optional[str], Set[str]] = defaultdict(set)
+        self._jobs_by_status: Dict[TrainingStatus, Set[str]] = defaultdict(set)
+        # Finished jobs per (model type, status), sorted by (completed_at, job_id)
+        self._by_type_status: Dict[Tuple[ModelType, TrainingStatus], List[Tuple[datetime, str]]] = defaultdict(list)
+        self.metrics_table = MetricsTable()
+        # Completed jobs per model type, sorted by (accuracy, job_id)
+        self._jobs_by_accuracy: Dict[ModelType, List[Tuple[float, str]]] = defaultdict(list)
+        self._perf_cache: Dict[Tuple[ModelType, int], Tuple[float, Dict[str, Any]]] = {}
+        self.performance_cache_ttl = 60  # seconds
         self.quality_modifiers: Dict[str, QualityModifier] = {}
+        # Per-model LRU of prediction confidences keyed by feature vector
+        self._confidence_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.confidence_cache_size = 4096
+        self._modifier_table: Optional[List[Tuple[QualityModifier, Optional[float], Optional[float]]]] = None
+        self._modifier_cache: Dict[Tuple[Optional[str], bool], List[QualityModifier]] = {}
+        
+        # Quality modifier writes are coalesced into batched upserts
+        self._store_queue: Optional[asyncio.Queue] = None
+        self._store_task: Optional[asyncio.Task] = None
+        self.store_batch_size = 128
+        
+        # Concurrent training jobs, bounding CPU and memory contention between fits; each job's
+        # cross-validation gets an equal share of the CPUs (see _cross_val_n_jobs)
+        self.max_parallel_training = 4
+        self._training_semaphore: Optional[asyncio.Semaphore] = None
+        
+        # Training data loading
+        self.training_page_size = 5000
+        self.training_page_prefetch = 4
         
         # Initialize agent IDs
         self.agent_ids = {
@@ -159,18 +360,26 @@ class ModelTrainer:
         """Train a model with the specified configuration"""
         try:
             # Create training job
-            job_id = hashlib.md5(f"{model_type.value}_{datetime.now().isoformat()}_{user_id}".encode()).hexdigest()
+            now = datetime.now()
+            job_id = hashlib.blake2b(f"{model_type.value}_{now.isoformat()}_{user_id}".encode(), digest_size=16).hexdigest()
             job = TrainingJob(
                 id=job_id,
                 model_type=model_type,
                 config=config or self.default_configs.get(model_type),
                 status=TrainingStatus.PENDING,
-                created_at=datetime.now(),
+                created_at=now,
+                started_at=None,
+                completed_at=None,
+                metrics=None,
+                model_path=None,
+                error_message=None,
                 user_id=user_id,
                 dataset_info={}
             )
             
             self.training_jobs[job_id] = job
+            self._jobs_by_user[user_id].add(job_id)
+            self._jobs_by_status[job.status].add(job_id)
             
             # Start training asynchronously
             asyncio.create_task(self._train_model_async(job_id))
@@ -182,43 +391,69 @@ class ModelTrainer:
             raise
     
     async def _train_model_async(self, job_id: str):
-        """Asynchronous model training"""
+        """Asynchronous model training, limited to max_parallel_training concurrent jobs"""
+        if self._training_semaphore is None:
+            self._training_semaphore = asyncio.Semaphore(self.max_parallel_training)
+        
+        async with self._training_semaphore:
+            await self._run_training_job(job_id)
+    
+    async def _run_training_job(self, job_id: str):
+        """Run a single training job"""
         try:
             job = self.training_jobs[job_id]
-            job.status = TrainingStatus.TRAINING
+            self._set_job_status(job, TrainingStatus.TRAINING)
             job.started_at = datetime.now()
             
-            # Load training data
-            training_data = await self._load_training_data(job.config.model_type)
+            # Load training data pages while extracting features from those already fetched
+            pages: asyncio.Queue = asyncio.Queue(maxsize=self.training_page_prefetch)
+            loader = asyncio.create_task(self._load_training_data(job.config, pages))
+            try:
+                training_data, features, targets, text_features = await self._collect_training_pages(pages, job.config)
+            except BaseException:
+                # Don't leave the loader blocked on a full queue
+                loader.cancel()
+                await asyncio.gather(loader, return_exceptions=True)
+                raise
+            
+            # A failed page load fails the job instead of training on partial data
+            await loader
             
             if not training_data:
                 raise Exception("No training data available")
             
             # Prepare features and target
-            X, y = await self._prepare_training_data(training_data, job.config)
+            X, y = await self._prepare_training_data(training_data, job.config, features, targets, text_features)
             
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
                 X, y, test_size=job.config.test_size, random_state=job.config.random_state
             )
             
+            # Histogram GBDT only accepts dense input
+            if job.config.model_type in HIST_GBDT_MODEL_TYPES and sp.issparse(X_train):
+                X_train = X_train.toarray()
+                X_test = X_test.toarray()
+            
             # Train model
-            model, metrics = await self._train_model(X_train, y_train, X_test, y_test, job.config)
+            model, metrics, y_pred = await self._train_model(X_train, y_train, X_test, y_test, job.config)
             
-            # Validate model
-            validation_metrics = await self._validate_model(model, X_test, y_test, job.config)
+            # Validate model, reusing the test set predictions from training
+            validation_metrics = await self._validate_model(model, X_test, y_test, y_pred, job.config)
             
             # Combine metrics
             combined_metrics = {**metrics, **validation_metrics}
             
             # Save model
             model_path = await self._save_model(model, job.config.model_type, job_id)
+            combined_metrics["model_size"] = os.path.getsize(model_path)
             
             # Update job
-            job.status = TrainingStatus.COMPLETED
+            self._set_job_status(job, TrainingStatus.COMPLETED)
             job.completed_at = datetime.now()
             job.metrics = TrainingMetrics(**combined_metrics)
             job.model_path = model_path
+            self._index_finished_job(job_id, job)
             
             # Store model in memory
             self.models[job_id] = model
@@ -227,60 +462,144 @@ class ModelTrainer:
             
         except Exception as e:
             logger.error(f"Error in training job {job_id}: {e}")
-            job.status = TrainingStatus.FAILED
+            self._set_job_status(job, TrainingStatus.FAILED)
             job.error_message = str(e)
             job.completed_at = datetime.now()
+            self._index_finished_job(job_id, job)
+    
+    def _set_job_status(self, job: TrainingJob, status: TrainingStatus):
+        """Update a job's status and the status index"""
+        self._jobs_by_status[job.status].discard(job.id)
+        job.status = status
+        self._jobs_by_status[status].add(job.id)
     
-    async def _load_training_data(self, model_type: ModelType) -> List[Dict[str, Any]]:
-        """Load training data from database"""
+    def _index_finished_job(self, job_id: str, job: TrainingJob):
+        """Record a finished job in the (model type, status) index and drop stale performance aggregates"""
+        bisect.insort(self._by_type_status[(job.model_type, job.status)], (job.completed_at, job_id))
+        
+        if job.status == TrainingStatus.COMPLETED:
+            # Jobs without an accuracy (e.g. regression models) rank as 0
+            accuracy = getattr(job.metrics, "accuracy", None)
+            bisect.insort(self._jobs_by_accuracy[job.model_type], (accuracy if accuracy is not None else 0, job_id))
+            self.metrics_table.append(job_id, job)
+        
+        for key in [key for key in self._perf_cache if key[0] == job.model_type]:
+            del self._perf_cache[key]
+    
+    def _training_data_query(self, config: TrainingConfig):
+        """Build the training data query for a model type"""
+        model_type = config.model_type
+        columns = ",".join(dict.fromkeys(["id"] + config.columns)) if config.columns else "*"
+        
+        if model_type == ModelType.QUALITY_PREDICTOR:
+            return self.supabase.from_("crawled_items").select(columns).gte("quality_score", 0)
+        elif model_type == ModelType.PRICE_PREDICTOR:
+            return self.supabase.from_("crawled_items").select(columns).gt("price", 0)
+        elif model_type == ModelType.CATEGORY_CLASSIFIER:
+            return self.supabase.from_("crawled_items").select(columns).neq("category", "")
+        elif model_type == ModelType.SIMILITY_SCORER:
+            return self.supabase.from_("search_index").select(columns).gte("quality_score", 0.5)
+        else:
+            return self.supabase.from_("crawled_items").select(columns)
+    
+    async def _iter_training_data(self, config: TrainingConfig, page_size: int = None) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """Iterate over training data in pages using server-side pagination"""
+        page_size = page_size or self.training_page_size
+        offset = 0
+        
+        while True:
+            query = self._training_data_query(config)
+            response = await query.order("id").range(offset, offset + page_size - 1).execute()
+            page = response.data or []
+            
+            # The server may cap rows per response (PostgREST max_rows), so a short
+            # page doesn't mean the end; only an empty one does
+            if not page:
+                break
+            
+            yield page
+            offset += len(page)
+    
+    async def _load_training_data(self, config: TrainingConfig, pages: asyncio.Queue):
+        """Load training data from database page by page onto a queue"""
         try:
-            # Query database based on model type
-            if model_type == ModelType.QUALITY_PREDICTOR:
-                response = await self.supabase.from("crawled_items").select("*").gte("quality_score", 0).execute()
-            elif model_type == ModelType.PRICE_PREDICTOR:
-                response = await self.supabase.from("crawled_items").select("*").gt("price", 0).execute()
-            elif model_type == ModelType.CATEGORY_CLASSIFIER:
-                response = await self.supabase.from("crawled_items").select("*").neq("category", "").execute()
-            elif model_type == ModelType.SIMILITY_SCORER:
-                response = await self.supabase.from("search_index").select("*").gte("quality_score", 0.5).execute()
-            else:
-                response = await self.supabase.from("crawled_items").select("*").execute()
-            
-            return response.data or []
+            async for page in self._iter_training_data(config):
+                await pages.put(page)
             
         except Exception as e:
             logger.error(f"Error loading training data: {e}")
-            return []
+            # Unblock the consumer, then fail the job
+            await pages.put(None)
+            raise
+        
+        # Signal the end of the data
+        await pages.put(None)
     
-    async def _prepare_training_data(self, data: List[Dict[str, Any]], config: TrainingConfig) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare training data features and target"""
-        try:
-            # Extract features
-            features = []
-            targets = []
+    async def _collect_training_pages(self, pages: asyncio.Queue, config: TrainingConfig) -> Tuple[List[Dict[str, Any]], List[List[Any]], List[Any], Optional[sp.csr_matrix]]:
+        """Extract base and hashed text features from training data pages as they arrive"""
+        data = []
+        features = []
+        targets = []
+        text_blocks = []
+        hashing_vectorizer = self._hashing_vectorizer(config)
+        
+        while True:
+            page = await pages.get()
+            if page is None:
+                break
             
-            for item in data:
-                # Extract feature values
-                feature_vector = []
-                
-                for feature_name in config.features:
-                    if feature_name in item:
-                        value = item[feature_name]
-                        feature_vector.append(value)
-                    else:
-                        # Handle missing features
-                        feature_vector.append(0)
-                
-                features.append(feature_vector)
-                targets.append(item.get(config.target, 0))
+            page_features, page_targets = self._extract_base_features(page, config)
+            data.extend(page)
+            features.extend(page_features)
+            targets.extend(page_targets)
+            
+            # Hashing is stateless, so text can be vectorized page by page
+            if config.use_text_features:
+                text_blocks.append(await asyncio.to_thread(hashing_vectorizer.transform, self._combine_text_fields(page)))
+        
+        text_features = sp.vstack(text_blocks, format='csr') if text_blocks else None
+        
+        return data, features, targets, text_features
+    
+    def _extract_base_features(self, data: List[Dict[str, Any]], config: TrainingConfig) -> Tuple[List[List[Any]], List[Any]]:
+        """Extract configured feature values and targets"""
+        features = []
+        targets = []
+        
+        for item in data:
+            # Extract feature values
+            feature_vector = []
+            
+            for feature_name in config.features:
+                if feature_name in item:
+                    value = item[feature_name]
+                    feature_vector.append(value)
+                else:
+                    # Handle missing features
+                    feature_vector.append(0)
             
-            # Convert to numpy arrays
-            X = np.array(features)
-            y = np.array(targets)
+            features.append(feature_vector)
+            targets.append(item.get(config.target, 0))
+        
+        return features, targets
+    
+    async def _prepare_training_data(self, data: List[Dict[str, Any]], config: TrainingConfig, features: List[List[Any]] = None, targets: List[Any] = None, text_features: sp.csr_matrix = None) -> Tuple[Union[np.ndarray, sp.csr_matrix], np.ndarray]:
+        """Prepare training data features and target"""
+        try:
+            # Extract features unless they were collected while loading
+            if features is None or targets is None:
+                features, targets = self._extract_base_features(data, config)
+            
+            # Convert to numpy arrays (float32 halves memory traffic for fit/predict)
+            X = np.array(features, dtype=np.float32)
+            if config.model_type == ModelType.CATEGORY_CLASSIFIER:
+                y = np.array(targets)
+            else:
+                y = np.array(targets, dtype=np.float32)
             
             # Handle text features
             if config.use_text_features:
-                X = await self._add_text_features(X, data, config)
+                X = await self._add_text_features(X, data, config, text_features)
             
             # Handle categorical features
             if config.use_categorical_features:
@@ -290,12 +609,21 @@ class ModelTrainer:
             if config.use_numerical_features:
                 X = await self._add_numerical_features(X, data, config)
             
-            # Scale features
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
+            scaler_key = f"{config.model_type.value}_scaler"
+            
+            # Fitted transformers changed, so the inference pipeline must be rebuilt
+            self._feature_pipelines.pop(config.model_type, None)
+            
+            # Tree models don't need scaling
+            if config.model_type in HIST_GBDT_MODEL_TYPES:
+                self.scalers.pop(scaler_key, None)
+                return X, y
+            
+            # Scale features (centering would densify a sparse matrix)
+            scaler = StandardScaler(with_mean=not sp.issparse(X), copy=False)
+            X_scaled = await asyncio.to_thread(scaler.fit_transform, X)
             
             # Store scaler
-            scaler_key = f"{config.model_type.value}_scaler"
             self.scalers[scaler_key] = scaler
             
             return X_scaled, y
@@ -304,39 +632,29 @@ class ModelTrainer:
             logger.error(f"Error preparing training data: {e}")
             raise
     
-    async def _add_text_features(self, X: np.ndarray, data: List[Dict[str, Any]], config: TrainingConfig) -> np.ndarray:
-        """Add text-based features using TF-IDF"""
+    async def _add_text_features(self, X: np.ndarray, data: List[Dict[str, Any]], config: TrainingConfig, text_features: sp.csr_matrix = None) -> Union[np.ndarray, sp.csr_matrix]:
+        """Add text-based features using feature hashing"""
         try:
-            # Combine text fields
-            texts = []
-            for item in data:
-                text_parts = []
-                
-                # Add title
-                if item.get("title"):
-                    text_parts.append(item["title"])
-                
-                # Add description
-                if item.get("description"):
-                    text_parts.append(item["description"])
-                
-                # Add keywords
-                if item.get("keywords"):
-                    text_parts.extend(item["keywords"])
-                
-                combined_text = " ".join(text_parts)
-                texts.append(combined_text)
+            hashing_vectorizer = self._hashing_vectorizer(config)
+            
+            # Hash the combined text fields unless already hashed while loading
+            if text_features is None:
+                text_features = await asyncio.to_thread(hashing_vectorizer.transform, self._combine_text_fields(data))
             
-            # Create TF-IDF features
-            vectorizer = TfidfVectorizer(max_features=config.max_features, stop_words='english')
-            text_features = vectorizer.fit_transform(texts)
+            # Tree models don't need TF-IDF weighting
+            if config.model_type in HIST_GBDT_MODEL_TYPES:
+                vectorizer = hashing_vectorizer
+            else:
+                tfidf = TfidfTransformer()
+                text_features = await asyncio.to_thread(tfidf.fit_transform, text_features)
+                vectorizer = make_pipeline(hashing_vectorizer, tfidf)
             
             # Store vectorizer
             vectorizer_key = f"{config.model_type.value}_vectorizer"
             self.vectorizers[vectorizer_key] = vectorizer
             
-            # Combine with existing features
-            X_combined = np.hstack([X, text_features.toarray()])
+            # Combine with existing features, keeping the text block sparse
+            X_combined = sp.hstack([sp.csr_matrix(X), text_features], format='csr', dtype=np.float32)
             
             return X_combined
             
@@ -344,30 +662,67 @@ class ModelTrainer:
             logger.error(f"Error adding text features: {e}")
             return X
     
-    async def _add_categorical_features(self, X: np.ndarray, data: List[Dict[str, Any]], config: TrainingConfig) -> np.ndarray:
+    def _hashing_vectorizer(self, config: TrainingConfig) -> HashingVectorizer:
+        """Create the stateless text vectorizer for a configuration"""
+        return HashingVectorizer(n_features=config.max_features, alternate_sign=False, stop_words='english', dtype=np.float32)
+    
+    def _combine_text_fields(self, items: List[Dict[str, Any]]) -> List[str]:
+        """Combine title, description and keywords of each item into one text"""
+        texts = []
+        
+        for item in items:
+            text_parts = []
+            
+            # Add title
+            if item.get("title"):
+                text_parts.append(item["title"])
+            
+            # Add description
+            if item.get("description"):
+                text_parts.append(item["description"])
+            
+            # Add keywords
+            if item.get("keywords"):
+                text_parts.extend(item["keywords"])
+            
+            texts.append(" ".join(text_parts))
+        
+        return texts
+    
+    async def _add_categorical_features(self, X: Union[np.ndarray, sp.csr_matrix], data: List[Dict[str, Any]], config: TrainingConfig) -> Union[np.ndarray, sp.csr_matrix]:
         """Add categorical features using label encoding"""
         try:
             # Handle categorical features
-            categorical_features = ["category", "brand", "condition", "platform"]
+            categorical_features = [
+                feature_name for feature_name in ["category", "brand", "condition", "platform"]
+                if feature_name in config.features
+            ]
+            
+            if not categorical_features:
+                return X
+            
+            df = pd.DataFrame(data, columns=categorical_features)
+            encoded_columns = []
             
             for feature_name in categorical_features:
-                if feature_name in config.features:
-                    # Get unique values
-                    unique_values = list(set(item.get(feature_name, "") for item in data))
-                    
-                    # Create label encoder
-                    encoder = LabelEncoder()
-                    encoder.fit(unique_values)
-                    
-                    # Encode values
-                    encoded_values = encoder.transform([item.get(feature_name, "") for item in data])
-                    
-                    # Add to features
-                    X = np.column_stack([X, encoded_values])
-                    
-                    # Store encoder
-                    encoder_key = f"{config.model_type.value}_{feature_name}_encoder"
-                    self.encoders[encoder_key] = encoder
+                column = df[feature_name].fillna("").astype(str)
+                
+                # Encode in a single pass, keeping a value -> code mapping for inference
+                codes, uniques = pd.factorize(column)
+                encoder = {value: code for code, value in enumerate(uniques)}
+                
+                encoded_columns.append(codes.astype(np.int32))
+                
+                # Store encoder
+                encoder_key = f"{config.model_type.value}_{feature_name}_encoder"
+                self.encoders[encoder_key] = encoder
+            
+            # Add all encoded columns to features in one copy
+            encoded_values = np.column_stack(encoded_columns)
+            if sp.issparse(X):
+                X = sp.hstack([X, sp.csr_matrix(encoded_values)], format='csr', dtype=np.float32)
+            else:
+                X = np.hstack([X, encoded_values], dtype=np.float32)
             
             return X
             
@@ -375,33 +730,22 @@ class ModelTrainer:
             logger.error(f"Error adding categorical features: {e}")
             return X
     
-    async def _add_numerical_features(self, X: np.ndarray, data: List[Dict[str, Any]], config: TrainingConfig) -> np.ndarray:
+    async def _add_numerical_features(self, X: Union[np.ndarray, sp.csr_matrix], data: List[Dict[str, Any]], config: TrainingConfig) -> Union[np.ndarray, sp.csr_matrix]:
         """Add numerical features"""
         try:
-            # Add derived numerical features
-            numerical_features = []
-            
-            for item in data:
-                # Title length
-                title_length = len(item.get("title", ""))
-                
-                # Description length
-                desc_length = len(item.get("description", ""))
-                
-                # Image count
-                image_count = len(item.get("images", []))
-                
-                # Keyword count
-                keyword_count = len(item.get("keywords", []))
-                
-                # Feature count
-                feature_count = len(item.get("features", []))
-                
-                numerical_features.append([title_length, desc_length, image_count, keyword_count, feature_count])
+            # Add derived numerical features: title/description length and image/keyword/feature counts
+            length_columns = ["title", "description", "images", "keywords", "features"]
+            df = pd.DataFrame(data, columns=length_columns)
+            X_numerical = np.column_stack([
+                df[column].map(len, na_action="ignore").fillna(0).to_numpy(dtype=np.float32)
+                for column in length_columns
+            ])
             
             # Add to existing features
-            X_numerical = np.array(numerical_features)
-            X_combined = np.hstack([X, X_numerical])
+            if sp.issparse(X):
+                X_combined = sp.hstack([X, sp.csr_matrix(X_numerical)], format='csr', dtype=np.float32)
+            else:
+                X_combined = np.hstack([X, X_numerical], dtype=np.float32)
             
             return X_combined
             
@@ -409,29 +753,26 @@ class ModelTrainer:
             logger.error(f"Error adding numerical features: {e}")
             return X
     
-    async def _train_model(self, X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray, y_test: np.ndarray, config: TrainingConfig) -> Tuple[Any, Dict[str, float]]:
-        """Train the model and return metrics"""
+    async def _train_model(self, X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray, y_test: np.ndarray, config: TrainingConfig) -> Tuple[Any, Dict[str, float], np.ndarray]:
+        """Train the model and return metrics with the test set predictions"""
         try:
             start_time = time.time()
             
             # Select model based on type
-            if config.model_type == ModelType.QUALITY_PREDICTOR:
-                model = GradientBoostingRegressor(random_state=config.random_state)
-            elif config.model_type == ModelType.PRICE_PREDICTOR:
-                model = RandomForestRegressor(random_state=config.random_state)
+            if config.model_type in (ModelType.QUALITY_PREDICTOR, ModelType.PRICE_PREDICTOR):
+                model = HistGradientBoostingRegressor(max_bins=255, early_stopping=True, random_state=config.random_state)
             elif config.model_type == ModelType.CATEGORY_CLASSIFIER:
-                from sklearn.ensemble import RandomForestClassifier
-                model = RandomForestClassifier(random_state=config.random_state)
+                model = HistGradientBoostingClassifier(max_bins=255, early_stopping=True, random_state=config.random_state)
             elif config.model_type == ModelType.SIMILITY_SCORER:
                 model = LinearRegression()
             else:
                 model = LinearRegression()
             
-            # Train model
-            model.fit(X_train, y_train)
+            # Train model off the event loop
+            await asyncio.to_thread(model.fit, X_train, y_train)
             
             # Make predictions
-            y_pred = model.predict(X_test)
+            y_pred = await asyncio.to_thread(model.predict, X_test)
             
             # Calculate metrics
             training_time = time.time() - start_time
@@ -465,31 +806,66 @@ class ModelTrainer:
                     "training_time": training_time
                 }
             
-            # Cross-validation
-            cv_scores = cross_val_score(model, X_train, y_train, cv=config.cross_validation_folds)
+            # Cross-validation (folds run in parallel)
+            cv_scores = await asyncio.to_thread(
+                cross_val_score, model, X_train, y_train, cv=config.cross_validation_folds, n_jobs=self._cross_val_n_jobs()
+            )
             metrics["cross_val_score"] = np.mean(cv_scores)
             
-            # Feature importance
-            if hasattr(model, 'feature_importances_'):
-                feature_importance = dict(zip(config.features, model.feature_importances_))
-                metrics["feature_importance"] = feature_importance
+            # Feature importance of the configured features (histogram GBDT has no native importances)
+            if config.model_type in HIST_GBDT_MODEL_TYPES:
+                importances = await asyncio.to_thread(
+                    self._base_feature_importance, model, X_test, y_test, len(config.features), 5, config.random_state
+                )
+                metrics["feature_importance"] = dict(zip(config.features, importances))
             
-            return model, metrics
+            return model, metrics, y_pred
             
         except Exception as e:
             logger.error(f"Error training model: {e}")
             raise
     
-    async def _validate_model(self, model: Any, X_test: np.ndarray, y_test: np.ndarray, config: TrainingConfig) -> Dict[str, float]:
-        """Validate the model on test data"""
-        try:
-            start_time = time.time()
+    def _cross_val_n_jobs(self) -> int:
+        """Cross-validation workers per job, so max_parallel_training concurrent jobs don't oversubscribe the CPUs"""
+        return max(1, (os.cpu_count() or 1) // self.max_parallel_training)
+    
+    def _base_feature_importance(self, model: Any, X_test: np.ndarray, y_test: np.ndarray, n_features: int, n_repeats: int, random_state: int) -> np.ndarray:
+        """Permutation importance of the first n_features columns, leaving the text/derived blocks unpermuted"""
+        rng = np.random.RandomState(random_state)
+        baseline = model.score(X_test, y_test)
+        X_permuted = np.array(X_test, copy=True)
+        importances = np.zeros(n_features)
+        
+        for column in range(n_features):
+            original = X_permuted[:, column].copy()
+            scores = []
             
-            # Make predictions
-            y_pred = model.predict(X_test)
+            for _ in range(n_repeats):
+                X_permuted[:, column] = rng.permutation(original)
+                scores.append(model.score(X_permuted, y_test))
             
-            # Calculate validation metrics
-            prediction_time = time.time() - start_time
+            X_permuted[:, column] = original
+            importances[column] = baseline - np.mean(scores)
+        
+        return importances
+    
+    async def _validate_model(self, model: Any, X_test: np.ndarray, y_test: np.ndarray, y_pred: Optional[np.ndarray], config: TrainingConfig) -> Dict[str, float]:
+        """Validate the model on test data"""
+        try:
+            if y_pred is None:
+                start_time = time.time()
+                
+                # Make predictions
+                y_pred = await asyncio.to_thread(model.predict, X_test)
+                
+                # Calculate validation metrics
+                prediction_time = time.time() - start_time
+            else:
+                # Time a small sample and scale it to the test set size
+                sample = X_test[:100]
+                start_time = time.time()
+                model.predict(sample)
+                prediction_time = (time.time() - start_time) * X_test.shape[0] / max(sample.shape[0], 1)
             
             if config.model_type in [ModelType.QUALITY_PREDICTOR, ModelType.PRICE_PREDICTOR, ModelType.SIMILITY_SCORER]:
                 # Regression metrics
@@ -532,8 +908,8 @@ class ModelTrainer:
             # Create model path
             model_path = f"models/{model_type.value}_{job_id}.pkl"
             
-            # Save model
-            joblib.dump(model, model_path)
+            # Save model (LZ4 keeps files small while decompressing at memory speed)
+            await asyncio.to_thread(joblib.dump, model, model_path, compress=('lz4', 3), protocol=5)
             
             # Save metadata
             metadata = {
@@ -556,15 +932,28 @@ class ModelTrainer:
     async def load_model(self, model_path: str) -> Any:
         """Load a trained model from disk"""
         try:
-            model = joblib.load(model_path)
+            model = await asyncio.to_thread(joblib.load, model_path)
             return model
             
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             raise
     
+    async def _get_model(self, model_id: str) -> Any:
+        """Get a trained model from memory, loading it from disk if it was evicted"""
+        model = self.models.get(model_id)
+        if model is None:
+            model = await self.load_model(self.training_jobs[model_id].model_path)
+            self.models[model_id] = model
+        
+        return model
+    
     async def predict_quality(self, item_data: Dict[str, Any], model_id: str = None) -> Dict[str, Any]:
         """Predict quality score for an item"""
+        return (await self.predict_quality_batch([item_data], model_id))[0]
+    
+    async def predict_quality_batch(self, items: List[Dict[str, Any]], model_id: str = None) -> List[Dict[str, Any]]:
+        """Predict quality scores for a batch of items"""
         try:
             # Use latest model if no specific model ID provided
             if not model_id:
@@ -574,255 +963,555 @@ class ModelTrainer:
                 raise Exception("No quality prediction model available")
             
             # Get model
-            model = self.models.get(model_id)
-            if not model:
-                model = await self.load_model(self.training_jobs[model_id].model_path)
-                self.models[model_id] = model
+            model = await self._get_model(model_id)
+            
+            # Prepare features for all items at once
+            X = await self._prepare_items_features(items, ModelType.QUALITY_PREDICTOR)
             
-            # Prepare features
-            features = await self._prepare_item_features(item_data, ModelType.QUALITY_PREDICTOR)
+            # Make predictions in a single call, off the event loop for batches
+            if len(items) > 1:
+                predictions = await asyncio.to_thread(model.predict, X)
+            else:
+                predictions = model.predict(X)
             
-            # Make prediction
-            prediction = model.predict([features])[0]
+            # Apply quality modifiers, resolving the table here since modifiers are created and
+            # deleted on the loop thread; only batches with modifiers to apply go off the event loop
+            modifier_table = self._get_modifier_table()
+            if len(items) > 1 and modifier_table:
+                modified_predictions = await asyncio.to_thread(self.apply_modifiers_batch, predictions, items, modifier_table=modifier_table)
+            else:
+                modified_predictions = self.apply_modifiers_batch(predictions, items, modifier_table=modifier_table)
             
-            # Apply quality modifiers
-            modified_prediction = await self._apply_quality_modifiers(prediction, item_data)
+            results = []
+            for features, prediction, modified_prediction in zip(X, predictions, modified_predictions):
+                results.append({
+                    "predicted_quality": prediction,
+                    "modified_quality": modified_prediction,
+                    "model_id": model_id,
+                    "confidence": self._calculate_prediction_confidence(features, model)
+                })
             
-            return {
-                "predicted_quality": prediction,
-                "modified_quality": modified_prediction,
-                "model_id": model_id,
-                "confidence": self._calculate_prediction_confidence(features, model)
-            }
+            return results
             
         except Exception as e:
             logger.error(f"Error predicting quality: {e}")
             raise
     
-    async def _prepare_item_features(self, item_data: Dict[str, Any], model_type: ModelType) -> List[float]:
+    async def _prepare_item_features(self, item_data: Dict[str, Any], model_type: ModelType) -> np.ndarray:
         """Prepare features for a single item"""
+        return (await self._prepare_items_features([item_data], model_type))[0]
+    
+    async def _prepare_items_features(self, items: List[Dict[str, Any]], model_type: ModelType) -> np.ndarray:
+        """Prepare features for a batch of items"""
         try:
-            config = self.default_configs.get(model_type)
-            if not config:
-                raise Exception(f"No configuration found for {model_type.value}")
+            pipeline = self._feature_pipelines.get(model_type)
+            if pipeline is None:
+                pipeline = self._build_feature_pipeline(model_type)
+                self._feature_pipelines[model_type] = pipeline
             
-            features = []
+            return pipeline(items)
             
-            for feature_name in config.features:
-                if feature_name in item_data:
-                    features.append(item_data[feature_name])
-                else:
-                    features.append(0)
+        except Exception as e:
+            logger.error(f"Error preparing item features: {e}")
+            raise
+    
+    def _build_feature_pipeline(self, model_type: ModelType) -> Callable[[List[Dict[str, Any]]], np.ndarray]:
+        """Specialize feature preparation for a model type with its fitted transformers bound in"""
+        config = self.default_configs.get(model_type)
+        if not config:
+            raise Exception(f"No configuration found for {model_type.value}")
+        
+        feature_names = tuple(config.features)
+        
+        # Text vectorizer
+        vectorizer = None
+        if config.use_text_features:
+            vectorizer = self.vectorizers.get(f"{model_type.value}_vectorizer")
+        
+        # Categorical encoders, in training column order
+        encoders = ()
+        if config.use_categorical_features:
+            encoders = tuple(
+                (feature_name, self.encoders.get(f"{model_type.value}_{feature_name}_encoder"))
+                for feature_name in ["category", "brand", "condition", "platform"]
+                if feature_name in feature_names
+            )
+        
+        use_numerical_features = config.use_numerical_features
+        
+        # Scaler statistics
+        scaler = self.scalers.get(f"{model_type.value}_scaler")
+        means = scaler.mean_.astype(np.float32) if scaler is not None and scaler.with_mean else None
+        scales = scaler.scale_.astype(np.float32) if scaler is not None and scaler.with_std else None
+        
+        def pipeline(items: List[Dict[str, Any]]) -> np.ndarray:
+            n_items = len(items)
+            
+            blocks = [
+                np.fromiter(
+                    (item.get(feature_name, 0) for item in items for feature_name in feature_names),
+                    dtype=np.float32,
+                    count=n_items * len(feature_names)
+                ).reshape(n_items, len(feature_names))
+            ]
             
             # Add text features
-            if config.use_text_features:
-                text_features = await self._extract_text_features(item_data)
-                features.extend(text_features)
+            if vectorizer is not None:
+                blocks.append(vectorizer.transform(self._combine_text_fields(items)).toarray())
             
             # Add categorical features
-            if config.use_categorical_features:
-                categorical_features = await self._encode_categorical_features(item_data, model_type)
-                features.extend(categorical_features)
+            for feature_name, encoder in encoders:
+                if encoder:
+                    values = (item.get(feature_name) for item in items)
+                    codes = [encoder.get("" if value is None else str(value), -1) for value in values]
+                else:
+                    codes = [0] * n_items
+                blocks.append(np.array(codes, dtype=np.float32).reshape(n_items, 1))
             
             # Add numerical features
-            if config.use_numerical_features:
-                numerical_features = await _extract_numerical_features(item_data)
-                features.extend(numerical_features)
+            if use_numerical_features:
+                blocks.append(self._extract_numerical_features(items))
             
-            # Scale features
-            scaler_key = f"{model_type.value}_scaler"
-            scaler = self.scalers.get(scaler_key)
-            if scaler:
-                features = scaler.transform([features])[0]
+            X = np.hstack(blocks, dtype=np.float32)
             
-            return features
+            # Scale features
+            if means is not None:
+                X -= means
+            if scales is not None:
+                X /= scales
             
-        except Exception as e:
-            logger.error(f"Error preparing item features: {e}")
-            raise
+            return X
+        
+        return pipeline
     
-    async def _extract_text_features(self, item_data: Dict[str, Any]) -> List[float]:
-        """Extract text features using TF-IDF"""
+    def _extract_numerical_features(self, items: List[Dict[str, Any]]) -> np.ndarray:
+        """Extract numerical features (missing or None fields count as length 0, as in training)"""
+        length_fields = ["title", "description", "images", "keywords", "features"]
+        X_numerical = np.zeros((len(items), len(length_fields)), dtype=np.float32)
+        
+        for row, item_data in enumerate(items):
+            for column, field_name in enumerate(length_fields):
+                value = item_data.get(field_name)
+                if value is None:
+                    continue
+                
+                try:
+                    X_numerical[row, column] = len(value)
+                except TypeError as e:
+                    logger.error(f"Error extracting numerical feature {field_name}: {e}")
+        
+        return X_numerical
+    
+    def _apply_quality_modifiers(self, predicted_quality: float, item_data: Dict[str, Any]) -> float:
+        """Apply quality modifiers to prediction"""
+        return self.apply_modifiers_batch(np.array([predicted_quality]), [item_data])[0]
+    
+    def apply_modifiers_batch(self, predicted_quality: np.ndarray, items: List[Dict[str, Any]], modifiers: List[QualityModifier] = None, modifier_table: List[Tuple[QualityModifier, Optional[float], Optional[float]]] = None) -> np.ndarray:
+        """Apply quality modifiers to a batch of predictions (CPU-bound, run via asyncio.to_thread from async code)"""
         try:
-            # Combine text fields
-            text_parts = []
-            
-            if item_data.get("title"):
-                text_parts.append(item_data["title"])
-            
-            if item_data.get("description"):
-                text_parts.append(item_data["description"])
-            
-            if item_data.get("keywords"):
-                text_parts.extend(item_data["keywords"])
+            modified_quality = np.array(predicted_quality, dtype=np.float64)
             
-            combined_text = " ".join(text_parts)
+            if modifiers is not None:
+                modifier_table = self._build_modifier_table(modifiers)
+            elif modifier_table is None:
+                modifier_table = self._get_modifier_table()
             
-            # Use vectorizer
-            vectorizer_key = "quality_predictor_vectorizer"
-            vectorizer = self.vectorizers.get(vectorizer_key)
+            if not modifier_table:
+                return modified_quality
             
-            if vectorizer:
-                text_features = vectorizer.transform([combined_text])
-                return text_features.toarray()[0]
-            else:
-                return []
-            
-        except Exception as e:
-            logger.error(f"Error extracting text features: {e}")
-            return []
-    
-    async def _encode_categorical_features(self, item_data: Dict[str, Any], model_type: ModelType) -> List[float]:
-        """Encode categorical features"""
-        try:
-            categorical_features = ["category", "brand", "condition", "platform"]
-            encoded_values = []
+            # Filter columns are extracted on first use by a modifier
+            filter_columns: Dict[str, Any] = {}
             
-            for feature_name in categorical_features:
-                encoder_key = f"{model_type.value}_{feature_name}_encoder"
-                encoder = self.encoders.get(encoder_key)
+            for modifier, factor, bias in modifier_table:
+                # Check which items the modifier applies to
+                applies = self._modifier_applies(modifier, items, filter_columns)
+                if not applies.any():
+                    continue
                 
-                if encoder and feature_name in item_data:
-                    encoded_value = encoder.transform([item_data[feature_name]])[0]
-                    encoded_values.append(encoded_value)
+                # Apply modifier
+                if factor is None:
+                    rows = np.flatnonzero(applies)
+                    modified_quality[rows] = self._apply_rule_based_modifier_batch(modifier, modified_quality[rows], [items[i] for i in rows])
                 else:
-                    encoded_values.append(0)
+                    modified_quality[applies] = modified_quality[applies] * factor + bias
+                
+                # Clamp to valid range
+                modified_quality[applies] = np.clip(modified_quality[applies], 0.0, 1.0)
             
-            return encoded_values
+            return modified_quality
             
         except Exception as e:
-            logger.error(f"Error encoding categorical features: {e}")
-            return []
+            logger.error(f"Error applying quality modifiers: {e}")
+            return np.array(predicted_quality, dtype=np.float64)
     
-    def _extract_numerical_features(self, item_data: Dict[str, Any]) -> List[float]:
-        """Extract numerical features"""
-        try:
-            return [
-                len(item_data.get("title", "")),
-                len(item_data.get("description", "")),
-                len(item_data.get("images", [])),
-                len(item_data.get("keywords", [])),
-                len(item_data.get("features", []))
-            ]
-        except Exception as e:
-            logger.error(f"Error extracting numerical features: {e}")
-            return [0, 0, 0, 0, 0]
+    def _get_modifier_table(self) -> List[Tuple[QualityModifier, Optional[float], Optional[float]]]:
+        """Get active modifiers with their (factor, bias) coefficients, rebuilt only when modifiers change"""
+        if self._modifier_table is None:
+            self._modifier_table = self._build_modifier_table(self.quality_modifiers.values())
+        
+        return self._modifier_table
     
-    async def _apply_quality_modifiers(self, predicted_quality: float, item_data: Dict[str, Any]) -> float:
-        """Apply quality modifiers to prediction"""
+    def _build_modifier_table(self, modifiers) -> List[Tuple[QualityModifier, Optional[float], Optional[float]]]:
+        """Resolve active modifiers into (modifier, factor, bias) entries"""
+        table = []
+        
+        for modifier in modifiers:
+            if not modifier.is_active:
+                continue
+            
+            if modifier.modifier_type == "additive":
+                table.append((modifier, 1.0, modifier.parameters.get("value", 0)))
+            elif modifier.modifier_type == "multiplicative":
+                table.append((modifier, modifier.parameters.get("factor", 1.0), 0.0))
+            elif modifier.modifier_type == "rule_based":
+                # Rule-based modifiers are evaluated per item
+                table.append((modifier, None, None))
+            else:
+                table.append((modifier, 1.0, 0.0))
+        
+        return table
+    
+    def _modifier_applies(self, modifier: QualityModifier, items: List[Dict[str, Any]], filter_columns: Dict[str, Any]) -> np.ndarray:
+        """Check which items of a batch a quality modifier applies to (parameters are validated at create time)"""
+        applies = np.ones(len(items), dtype=bool)
+        
+        # Check confidence threshold
+        if modifier.confidence_threshold > 0:
+            # This would require confidence calculation
+            pass
+        
+        # Check category filter
+        if "categories" in modifier.parameters:
+            applies &= self._member_mask(self._filter_column("category", items, filter_columns), modifier.parameters["categories"])
+        
+        # Check brand filter
+        if "brands" in modifier.parameters:
+            applies &= self._member_mask(self._filter_column("brand", items, filter_columns), modifier.parameters["brands"])
+        
+        # Check price range
+        if "price_range" in modifier.parameters:
+            low, high = modifier.parameters["price_range"]
+            prices = self._filter_column("price", items, filter_columns)
+            applies &= (prices >= low) & (prices <= high)
+        
+        return applies
+    
+    def _filter_column(self, field_name: str, items: List[Dict[str, Any]], filter_columns: Dict[str, Any]) -> Any:
+        """Get an item field used by modifier filters, extracting it once per batch"""
+        column = filter_columns.get(field_name)
+        if column is not None:
+            return column
+        
+        if field_name == "price":
+            # Missing prices count as 0; non-numeric prices become NaN so they fall outside every price range
+            column = np.fromiter(
+                (price if isinstance(price, (int, float, np.number)) else np.nan for price in (item_data.get("price", 0) for item_data in items)),
+                dtype=np.float64, count=len(items)
+            )
+        else:
+            column = [item_data.get(field_name) for item_data in items]
+        
+        filter_columns[field_name] = column
+        return column
+    
+    def _member_mask(self, values: List[Any], allowed) -> np.ndarray:
+        """Check each value with `in` against an allowed list, so None and missing values match a None entry"""
         try:
-            modified_quality = predicted_quality
+            members = frozenset(allowed)
+        except TypeError:
+            members = allowed
+        
+        def is_member(value):
+            try:
+                return value in members
+            except TypeError:
+                # Unhashable values need the original sequence
+                return value in allowed
+        
+        return np.fromiter((is_member(value) for value in values), dtype=bool, count=len(values))
+    
+    def _apply_rule_based_modifier(self, modifier: QualityModifier, current_quality: float, item_data: Dict[str, Any]) -> float:
+        """Apply rule-based quality modifier"""
+        if modifier._compiled_rules is None:
+            self._compile_modifier(modifier)
+        
+        item_text = {field: str(item_data.get(field)) for field in modifier._text_fields}
+        
+        for predicate, action in modifier._compiled_rules:
+            if predicate(item_data, item_text):
+                current_quality = action(current_quality)
+        
+        return current_quality
+    
+    def _apply_rule_based_modifier_batch(self, modifier: QualityModifier, qualities: np.ndarray, items: List[Dict[str, Any]]) -> np.ndarray:
+        """Apply rule-based quality modifier to a batch of items"""
+        if modifier._compiled_rules is None:
+            self._compile_modifier(modifier)
+        
+        table = modifier._rule_table
+        if table is None:
+            return np.array([self._apply_rule_based_modifier(modifier, q, item) for q, item in zip(qualities, items)], dtype=np.float64)
+        
+        field_values = self._encode_rule_fields(items, table.fields)
+        return apply_rule_table(
+            np.asarray(qualities, dtype=np.float64), field_values,
+            table.op_codes, table.action_codes, table.field_ids,
+            table.condition_values, table.action_values
+        )
+    
+    def _validate_modifier_parameters(self, modifier_type: str, parameters: Dict[str, Any]):
+        """Validate modifier filters and rules so they can be applied without runtime checks"""
+        for key in ["categories", "brands"]:
+            if key in parameters and not isinstance(parameters[key], (list, tuple, set)):
+                raise ValueError(f"Modifier {key} must be a list")
+        
+        if "price_range" in parameters:
+            price_range = parameters["price_range"]
+            if not (isinstance(price_range, (list, tuple)) and len(price_range) == 2 and all(isinstance(bound, (int, float)) for bound in price_range)):
+                raise ValueError("Modifier price_range must be a [min, max] pair of numbers")
+        
+        if modifier_type != "rule_based":
+            return
+        
+        rules = parameters.get("rules", [])
+        if not isinstance(rules, list):
+            raise ValueError("Modifier rules must be a list")
+        
+        for i, rule in enumerate(rules):
+            condition = rule.get("condition") if isinstance(rule, dict) else None
+            action = rule.get("action") if isinstance(rule, dict) else None
+            if not isinstance(condition, dict) or not isinstance(action, dict):
+                raise ValueError(f"Rule {i} needs a condition and an action")
             
-            for modifier in self.quality_modifiers.values():
-                if not modifier.is_active:
-                    continue
-                
-                # Check if modifier applies to this item
-                if await self._modifier_applies(modifier, item_data):
-                    # Apply modifier
-                    if modifier.modifier_type == "additive":
-                        modified_quality += modifier.parameters.get("value", 0)
-                    elif modifier.modifier_type == "multiplicative":
-                        modified_quality *= modifier.parameters.get("factor", 1.0)
-                    elif modifier.modifier_type == "rule_based":
-                        modified_quality = await self._apply_rule_based_modifier(modifier, modified_quality, item_data)
-                    
-                    # Clamp to valid range
-                    modified_quality = max(0.0, min(1.0, modified_quality))
+            operator_name = condition.get("operator")
+            value = condition.get("value")
+            if not condition.get("field") or operator_name not in RULE_OPERATORS:
+                raise ValueError(f"Rule {i} has an invalid condition: {condition}")
+            if operator_name in TEXT_RULE_OPERATORS and not isinstance(value, str):
+                raise ValueError(f"Rule {i} {operator_name} value must be a string")
+            if operator_name == "in" and not isinstance(value, (list, tuple, set)):
+                raise ValueError(f"Rule {i} in value must be a list")
+            if operator_name in ["greater_than", "less_than"]:
+                try:
+                    float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Rule {i} {operator_name} value must be numeric")
+            
+            action_type = action.get("type")
+            amount = action.get("factor" if action_type == "multiply" else "value")
+            if action_type not in RULE_ACTION_CODES or not isinstance(amount, (int, float)):
+                raise ValueError(f"Rule {i} has an invalid action: {action}")
+    
+    def _compile_modifier(self, modifier: QualityModifier):
+        """Compile a rule-based modifier's rules into closures and, when possible, a numeric rule table"""
+        modifier._compiled_rules, modifier._text_fields = self._compile_rules(modifier.parameters)
+        modifier._rule_table = self._compile_rule_table(modifier.parameters)
+    
+    def _compile_rules(self, parameters: Dict[str, Any]) -> Tuple[List[Tuple[Callable, Callable]], Tuple[str, ...]]:
+        """Compile rule conditions and actions into (predicate, action) closures and the fields they read as text"""
+        compiled = []
+        text_fields = {}
+        
+        for rule in parameters.get("rules", []):
+            condition = rule.get("condition")
+            action = rule.get("action")
             
-            return modified_quality
+            if not condition or not action:
+                continue
             
-        except Exception as e:
-            logger.error(f"Error applying quality modifiers: {e}")
-            return predicted_quality
+            predicate = self._compile_rule_condition(condition)
+            action_fn = self._compile_rule_action(action)
+            
+            if predicate and action_fn:
+                compiled.append((predicate, action_fn))
+                
+                if condition["operator"] in TEXT_RULE_OPERATORS:
+                    text_fields[condition["field"]] = None
+        
+        return compiled, tuple(text_fields)
     
-    async def _modifier_applies(self, modifier: QualityModifier, item_data: Dict[str, Any]) -> bool:
-        """Check if a quality modifier applies to an item"""
-        try:
-            # Check confidence threshold
-            if modifier.confidence_threshold > 0:
-                # This would require confidence calculation
-                pass
+    def _compile_rule_table(self, parameters: Dict[str, Any]) -> Optional[RuleTable]:
+        """Compile rules into parallel arrays, or None if any rule is not purely numeric"""
+        op_codes, action_codes, field_ids, condition_values, action_values = [], [], [], [], []
+        fields: Dict[Tuple[str, bool], int] = {}
+        
+        for rule in parameters.get("rules", []):
+            condition = rule.get("condition")
+            action = rule.get("action")
             
-            # Check category filter
-            if "categories" in modifier.parameters:
-                if item_data.get("category") not in modifier.parameters["categories"]:
-                    return False
+            # Mirror _compile_rules: incomplete or unknown rules are skipped
+            if not condition or not action:
+                continue
             
-            # Check brand filter
-            if "brands" in modifier.parameters:
-                if item_data.get("brand") not in modifier.parameters["brands"]:
-                    return False
+            field_name = condition.get("field")
+            operator_name = condition.get("operator")
+            action_type = action.get("type")
+            if not field_name or operator_name not in RULE_OPERATORS or action_type not in RULE_ACTION_CODES:
+                continue
             
-            # Check price range
-            if "price_range" in modifier.parameters:
-                price = item_data.get("price", 0)
-                price_range = modifier.parameters["price_range"]
-                if not (price_range[0] <= price <= price_range[1]):
-                    return False
+            if operator_name not in RULE_OP_CODES:
+                return None
             
-            return True
+            # equals compares raw values, so only numbers can be encoded
+            exact = operator_name == "equals"
+            value = condition.get("value")
+            if exact and not isinstance(value, (int, float)):
+                return None
+            
+            try:
+                condition_value = float(value)
+                action_value = float(action["factor"] if action_type == "multiply" else action["value"])
+            except (KeyError, TypeError, ValueError):
+                return None
+            
+            op_codes.append(RULE_OP_CODES[operator_name])
+            action_codes.append(RULE_ACTION_CODES[action_type])
+            field_ids.append(fields.setdefault((field_name, exact), len(fields)))
+            condition_values.append(condition_value)
+            action_values.append(action_value)
+        
+        return RuleTable(
+            op_codes=np.array(op_codes, dtype=np.int8),
+            action_codes=np.array(action_codes, dtype=np.int8),
+            field_ids=np.array(field_ids, dtype=np.int32),
+            condition_values=np.array(condition_values, dtype=np.float64),
+            action_values=np.array(action_values, dtype=np.float64),
+            fields=list(fields)
+        )
+    
+    def _encode_rule_fields(self, items: List[Dict[str, Any]], fields: List[Tuple[str, bool]]) -> np.ndarray:
+        """Encode item fields referenced by a rule table as float64, NaN where missing or non-numeric"""
+        field_values = np.full((len(items), len(fields)), np.nan)
+        
+        columns: Dict[str, List[Any]] = {}
+        
+        for k, (field_name, exact) in enumerate(fields):
+            if field_name not in columns:
+                columns[field_name] = [item_data.get(field_name) for item_data in items]
+            values = columns[field_name]
+            
+            # equals compares raw values, so only numbers are encoded for it; checking the
+            # distinct types first skips the per-item filter for all-numeric columns
+            if exact and not all(value_type is type(None) or issubclass(value_type, (int, float, np.number)) for value_type in set(map(type, values))):
+                values = [value if isinstance(value, (int, float, np.number)) else None for value in values]
+            
+            # Convert the whole column at once (None becomes NaN); columns with values float()
+            # rejects, or sequences numpy would unpack, fall back to per-item conversion
+            try:
+                column = np.array(values, dtype=np.float64)
+                if column.shape == (len(items),):
+                    field_values[:, k] = column
+                    continue
+            except (TypeError, ValueError, OverflowError):
+                pass
             
-        except Exception as e:
-            logger.error(f"Error checking modifier applicability: {e}")
-            return False
+            field_values[:, k] = [self._to_float(value) for value in values]
+        
+        return field_values
     
-    async def _apply_rule_based_modifier(self, modifier: QualityModifier, current_quality: float, item_data: Dict[str, Any]) -> float:
-        """Apply rule-based quality modifier"""
+    def _to_float(self, value: Any) -> float:
+        """Convert a value to float, NaN if it isn't numeric"""
         try:
-            rules = modifier.parameters.get("rules", [])
-            
-            for rule in rules:
-                condition = rule.get("condition")
-                action = rule.get("action")
+            return float(value)
+        except (TypeError, ValueError, OverflowError):
+            return np.nan
+    
+    def _compile_rule_condition(self, condition: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any], Dict[str, str]], bool]]:
+        """Compile a rule condition into a predicate specialized for its operator"""
+        field = condition.get("field")
+        operator_name = condition.get("operator")
+        value = condition.get("value")
+        
+        if not field or operator_name not in RULE_OPERATORS:
+            return None
+        
+        if operator_name == "equals":
+            return lambda item_data, item_text: item_data.get(field) == value
+        
+        if operator_name == "contains":
+            return lambda item_data, item_text: value in item_text[field]
+        
+        if operator_name == "in":
+            # Hashable list values become a frozenset for O(1) membership
+            members = value
+            if isinstance(value, (list, tuple, set)):
+                try:
+                    members = frozenset(value)
+                except TypeError:
+                    pass
+            
+            def is_member(item_data, item_text):
+                item_value = item_data.get(field)
+                try:
+                    return item_value in members
+                except TypeError:
+                    pass
                 
-                if condition and action:
-                    # Evaluate condition
-                    if await self._evaluate_rule_condition(condition, item_data):
-                        # Apply action
-                        if action["type"] == "add":
-                            current_quality += action["value"]
-                        elif action["type"] == "multiply":
-                            current_quality *= action["factor"]
-                        elif action["type"] == "set":
-                            current_quality = action["value"]
-            
-            return current_quality
+                # Unhashable item values need the original sequence
+                try:
+                    return item_value in value
+                except TypeError:
+                    return False
             
-        except Exception as e:
-            logger.error(f"Error applying rule-based modifier: {e}")
-            return current_quality
-    
-    async def _evaluate_rule_condition(self, condition: Dict[str, Any], item_data: Dict[str, Any]) -> bool:
-        """Evaluate a rule condition"""
+            return is_member
+        
+        # Numeric comparisons coerce the threshold once; non-numeric item values never match
         try:
-            field = condition.get("field")
-            operator = condition.get("operator")
-            value = condition.get("value")
+            threshold = float(value)
+        except (TypeError, ValueError):
+            return None
+        
+        if operator_name == "greater_than":
+            def greater_than(item_data, item_text):
+                try:
+                    return float(item_data.get(field)) > threshold
+                except (TypeError, ValueError, OverflowError):
+                    return False
             
-            if not field or operator not in ["equals", "contains", "greater_than", "less_than", "in"]:
+            return greater_than
+        
+        def less_than(item_data, item_text):
+            try:
+                return float(item_data.get(field)) < threshold
+            except (TypeError, ValueError, OverflowError):
                 return False
-            
-            item_value = item_data.get(field)
-            
-            if operator == "equals":
-                return item_value == value
-            elif operator == "contains":
-                return value in str(item_value)
-            elif operator == "greater_than":
-                return float(item_value) > float(value)
-            elif operator == "less_than":
-                return float(item_value) < float(value)
-            elif operator == "in":
-                return item_value in value
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error evaluating rule condition: {e}")
-            return False
+        
+        return less_than
+    
+    def _compile_rule_action(self, action: Dict[str, Any]) -> Optional[Callable[[float], float]]:
+        """Compile a rule action into a quality update function"""
+        action_type = action.get("type")
+        
+        if action_type == "add":
+            value = action["value"]
+            return lambda quality: quality + value
+        elif action_type == "multiply":
+            factor = action["factor"]
+            return lambda quality: quality * factor
+        elif action_type == "set":
+            value = action["value"]
+            return lambda quality: value
+        
+        return None
     
     def _calculate_prediction_confidence(self, features: List[float], model: Any) -> float:
+        """Calculate confidence in prediction, memoized per model and feature vector"""
+        try:
+            cache = self._confidence_cache.get(model)
+            if cache is None:
+                cache = self._confidence_cache[model] = LRUCache(maxsize=self.confidence_cache_size)
+        except TypeError:
+            # Models that can't be weakly referenced are not memoized
+            return self._compute_prediction_confidence(features, model)
+        
+        key = features.tobytes() if isinstance(features, np.ndarray) else tuple(features)
+        confidence = cache.get(key)
+        if confidence is None:
+            confidence = cache[key] = self._compute_prediction_confidence(features, model)
+        
+        return confidence
+    
+    def _compute_prediction_confidence(self, features: List[float], model: Any) -> float:
         """Calculate confidence in prediction"""
         try:
             # This is a simplified confidence calculation
@@ -833,7 +1522,14 @@ class ModelTrainer:
                 confidence = max(probabilities)
             else:
                 # For regression models, use a heuristic based on feature values
-                feature_variance = np.var(features)
+                n = len(features)
+                if 0 < n < 16:
+                    # Plain Python beats NumPy's per-call overhead on short vectors
+                    values = [float(x) for x in features]
+                    mean = sum(values) / n
+                    feature_variance = sum((x - mean) ** 2 for x in values) / n
+                else:
+                    feature_variance = np.var(features)
                 confidence = min(1.0, feature_variance / 10.0)  # Normalize variance
             
             return confidence
@@ -844,26 +1540,15 @@ class ModelTrainer:
     
     def _get_latest_model(self, model_type: ModelType) -> Optional[str]:
         """Get the latest model for a given type"""
-        try:
-            latest_job = None
-            latest_time = None
-            
-            for job_id, job in self.training_jobs.items():
-                if job.model_type == model_type and job.status == TrainingStatus.COMPLETED:
-                    if not latest_time or job.completed_at > latest_time:
-                        latest_time = job.completed_at
-                        latest_job = job_id
-            
-            return latest_job
-            
-        except Exception as e:
-            logger.error(f"Error getting latest model: {e}")
-            return None
+        completed = self._by_type_status.get((model_type, TrainingStatus.COMPLETED))
+        return completed[-1][1] if completed else None
     
     async def create_quality_modifier(self, name: str, description: str, modifier_type: str, parameters: Dict[str, Any], user_id: str = None) -> QualityModifier:
         """Create a new quality modifier"""
         try:
-            modifier_id = hashlib.md5(f"{name}_{datetime.now().isoformat()}".encode()).hexdigest()
+            self._validate_modifier_parameters(modifier_type, parameters)
+            modifier_id = secrets.token_hex(16)
+            now = datetime.now()
             
             modifier = QualityModifier(
                 id=modifier_id,
@@ -875,11 +1560,17 @@ class ModelTrainer:
                 confidence_threshold=parameters.get("confidence_threshold", 0.0),
                 quality_improvement=parameters.get("quality_improvement", 0.0),
                 is_active=True,
-                created_at=datetime.now(),
-                updated_at=datetime.now()
+                created_at=now,
+                updated_at=now,
+                user_id=user_id
             )
             
+            if modifier_type == "rule_based":
+                self._compile_modifier(modifier)
+            
             self.quality_modifiers[modifier_id] = modifier
+            self._modifier_table = None
+            self._modifier_cache.clear()
             
             # Store in database
             await self._store_quality_modifier(modifier)
@@ -891,41 +1582,94 @@ class ModelTrainer:
             raise
     
     async def _store_quality_modifier(self, modifier: QualityModifier):
-        """Store quality modifier in database"""
-        try:
-            modifier_data = {
-                "id": modifier.id,
-                "name": modifier.name,
-                "description": modifier.description,
-                "model_version": modifier.model_version,
-                "modifier_type": modifier.modifier_type,
-                "parameters": modifier.parameters,
-                "confidence_threshold": modifier.confidence_threshold,
-                "quality_improvement": modifier.quality_improvement,
-                "is_active": modifier.is_active,
-                "created_at": modifier.created_at.isoformat(),
-                "updated_at": modifier.updated_at.isoformat()
-            }
-            
-            await self.supabase.from("quality_modifiers").upsert(modifier_data)
-            
-        except Exception as e:
-            logger.error(f"Error storing quality modifier: {e}")
-            raise
+        """Store quality modifier in database via a batched upsert, raising if the write fails"""
+        if self._store_task is None or self._store_task.done():
+            self._store_queue = self._store_queue or asyncio.Queue()
+            self._store_task = asyncio.create_task(self._run_store_flusher())
+        
+        # Resolved by the flusher once the batch holding this modifier is written
+        stored = asyncio.get_running_loop().create_future()
+        await self._store_queue.put((modifier, stored))
+        await stored
+    
+    async def _run_store_flusher(self):
+        """Upsert queued quality modifiers in batches of up to store_batch_size"""
+        queue = self._store_queue
+        
+        while True:
+            batch = [await queue.get()]
+            
+            # Take whatever else is already queued (writes pile up while an upsert is in flight)
+            while len(batch) < self.store_batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            
+            try:
+                # An upsert can't touch the same row twice, so keep the latest write per id
+                rows = {modifier.id: self._serialize_quality_modifier(modifier) for modifier, _ in batch}
+                await self.supabase.from_("quality_modifiers").upsert(list(rows.values())).execute()
+                
+            except Exception as e:
+                logger.error(f"Error storing quality modifiers: {e}")
+                for _, stored in batch:
+                    if not stored.done():
+                        stored.set_exception(e)
+            else:
+                for _, stored in batch:
+                    if not stored.done():
+                        stored.set_result(None)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def flush(self):
+        """Wait until all queued quality modifiers have been written"""
+        if self._store_queue is not None:
+            await self._store_queue.join()
+    
+    async def close(self):
+        """Flush pending quality modifier writes and stop the background flusher"""
+        await self.flush()
+        
+        if self._store_task is not None:
+            self._store_task.cancel()
+            await asyncio.gather(self._store_task, return_exceptions=True)
+            self._store_task = None
+    
+    def _serialize_quality_modifier(self, modifier: QualityModifier) -> Dict[str, Any]:
+        """Convert quality modifier to a database row"""
+        return {
+            "id": modifier.id,
+            "name": modifier.name,
+            "description": modifier.description,
+            "model_version": modifier.model_version,
+            "modifier_type": modifier.modifier_type,
+            "parameters": modifier.parameters,
+            "confidence_threshold": modifier.confidence_threshold,
+            "quality_improvement": modifier.quality_improvement,
+            "is_active": modifier.is_active,
+            "created_at": modifier.created_at.isoformat(),
+            "updated_at": modifier.updated_at.isoformat()
+        }
     
     async def get_training_jobs(self, user_id: str = None, status: TrainingStatus = None) -> List[TrainingJob]:
         """Get training jobs with optional filtering"""
         try:
-            jobs = []
+            if not user_id and not status:
+                return list(self.training_jobs.values())
+            
+            # Intersect the user and status indexes instead of scanning every job
+            if user_id and status:
+                job_ids = self._jobs_by_user.get(user_id, set()) & self._jobs_by_status.get(status, set())
+            elif user_id:
+                job_ids = self._jobs_by_user.get(user_id, set())
+            else:
+                job_ids = self._jobs_by_status.get(status, set())
             
-            for job_id, job in self.training_jobs.items():
-                if user_id and job.user_id != user_id:
-                    continue
-                
-                if status and job.status != status:
-                    continue
-                
-                jobs.append(job)
+            jobs = [self.training_jobs[job_id] for job_id in job_ids]
+            jobs.sort(key=lambda job: job.created_at)
             
             return jobs
             
@@ -936,18 +1680,25 @@ class ModelTrainer:
     async def get_quality_modifiers(self, user_id: str = None, active_only: bool = False) -> List[QualityModifier]:
         """Get quality modifiers with optional filtering"""
         try:
-            modifiers = []
+            key = (user_id, active_only)
+            modifiers = self._modifier_cache.get(key)
             
-            for modifier_id, modifier in self.quality_modifiers.items():
-                if user_id and modifier.user_id != user_id:
-                    continue
+            if modifiers is None:
+                modifiers = []
                 
-                if active_only and not modifier.is_active:
-                    continue
+                for modifier_id, modifier in self.quality_modifiers.items():
+                    if user_id and modifier.user_id != user_id:
+                        continue
+                    
+                    if active_only and not modifier.is_active:
+                        continue
+                    
+                    modifiers.append(modifier)
                 
-                modifiers.append(modifier)
+                self._modifier_cache[key] = modifiers
             
-            return modifiers
+            # Copy so callers can't mutate the cached list
+            return list(modifiers)
             
         except Exception as e:
             logger.error(f"Error getting quality modifiers: {e}")
@@ -958,9 +1709,11 @@ class ModelTrainer:
         try:
             if modifier_id in self.quality_modifiers:
                 del self.quality_modifiers[modifier_id]
+                self._modifier_table = None
+                self._modifier_cache.clear()
                 
                 # Delete from database
-                await self.supabase.from("quality_modifiers").delete().eq("id", modifier_id).execute()
+                await self.supabase.from_("quality_modifiers").delete().eq("id", modifier_id).execute()
                 
                 return True
             
@@ -976,11 +1729,23 @@ class ModelTrainer:
             if not model_types:
                 model_types = list(ModelType)
             
+            results = await asyncio.gather(
+                *[self.train_model(model_type, user_id=user_id) for model_type in model_types],
+                return_exceptions=True
+            )
+            
             jobs = []
+            errors = []
+            for model_type, result in zip(model_types, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error retraining {model_type.value} model: {result}")
+                    errors.append(result)
+                else:
+                    jobs.append(result)
             
-            for model_type in model_types:
-                job = await self.train_model(model_type, user_id=user_id)
-                jobs.append(job)
+            # Partial failures are logged; if nothing started, surface the error
+            if errors and not jobs:
+                raise errors[0]
             
             return jobs
             
@@ -991,33 +1756,47 @@ class ModelTrainer:
     async def get_model_performance(self, model_type: ModelType, days: int = 30) -> Dict[str, Any]:
         """Get model performance metrics"""
         try:
-            # Get training jobs for the model type
-            jobs = []
-            for job_id, job in self.training_jobs.items():
-                if job.model_type == model_type and job.status == TrainingStatus.COMPLETED:
-                    # Check if job was completed within the specified days
-                    if job.completed_at and (datetime.now() - job.completed_at).days <= days:
-                        jobs.append(job)
+            cached = self._perf_cache.get((model_type, days))
+            if cached and time.monotonic() - cached[0] < self.performance_cache_ttl:
+                return cached[1]
             
-            if not jobs:
+            # Select completed jobs within the specified days from the metrics table
+            table = self.metrics_table
+            cutoff = datetime.now() - timedelta(days=days + 1)
+            rows = table.rows(model_type, cutoff)
+            
+            if not len(rows):
                 return {}
             
-            # Calculate aggregate metrics
+            # Calculate aggregate metrics in a single pass over the selected rows
+            values = table.values[rows]
+            with warnings.catch_warnings():
+                # Columns with no recorded values average to NaN
+                warnings.simplefilter("ignore", RuntimeWarning)
+                means = np.nanmean(values, axis=0)
+            
+            # Most accurate job inside the window, usually the first one checked
+            best_job_id = next(
+                job_id for _, job_id in reversed(self._jobs_by_accuracy[model_type])
+                if self.training_jobs[job_id].completed_at > cutoff
+            )
+            
             metrics = {
-                "total_jobs": len(jobs),
-                "average_accuracy": np.mean([job.metrics.accuracy for job in jobs if job.metrics]),
-                "average_precision": np.mean([job.metrics.precision for job in jobs if job.metrics]),
-                "average_recall": np.mean([job.metrics.recall for job in jobs if job.metrics]),
-                "average_f1": np.mean([job.metrics.f1_score for job in jobs if job.metrics]),
-                "average_rmse": np.mean([job.metrics.rmse for job in jobs if job.metrics]),
-                "average_mae": np.mean([job.metrics.mae for job in jobs if job.metrics]),
-                "average_r2": np.mean([job.metrics.r2_score for job in jobs if job.metrics]),
-                "average_training_time": np.mean([job.metrics.training_time for job in jobs if job.metrics]),
-                "best_job": max(jobs, key=lambda j: j.metrics.accuracy if j.metrics else 0) if jobs else None
+                "total_jobs": len(rows),
+                "average_accuracy": means[0],
+                "average_precision": means[1],
+                "average_recall": means[2],
+                "average_f1": means[3],
+                "average_rmse": means[4],
+                "average_mae": means[5],
+                "average_r2": means[6],
+                "average_training_time": means[7],
+                "best_job": self.training_jobs[best_job_id]
             }
             
+            self._perf_cache[(model_type, days)] = (time.monotonic(), metrics)
             return metrics
             
         except Exception as e:
             logger.error(f"Error getting model performance: {e}")
-            return {}
\ No newline at end of file
+            return {}
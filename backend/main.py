@@ -1,10 +1,13 @@
 from fastapi import FastAPI, Request, HTTPException
 from pydantic import BaseModel
-from litellm import completion
-from llama_index.core import VectorStoreIndex, StorageContext
+from litellm import acompletion
+from llama_index.core import VectorStoreIndex, StorageContext, load_index_from_storage
 from llama_index.embeddings.openai import OpenAIEmbedding
 from bitwarden import BitwardenClient  # CLI wrapper
+import asyncio
 import os
+import threading
+import time
 import sentry_sdk
 
 app = FastAPI()
@@ -21,16 +24,61 @@ sentry_sdk.init(
     release=f"{os.getenv('npm_package_version', '1.0.0')}",
 )
 
-# Bitwarden for secrets
+# Bitwarden for secrets, cached until rotation or TTL expiry
+SECRET_TTL = 300  # seconds
+_secret_cache: dict[str, tuple[str, float]] = {}
+_secret_lock = asyncio.Lock()
+
 async def get_secret(name: str):
-    client = BitwardenClient()
-    await client.login(email=os.getenv("BITWARDEN_EMAIL"), password=os.getenv("BITWARDEN_PASSWORD"))
-    item = await client.get_item("cloudcommerce-keys")
-    return item.fields[name].value
+    cached = _secret_cache.get(name)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    async with _secret_lock:
+        # Another request may have fetched it while we waited
+        cached = _secret_cache.get(name)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        client = BitwardenClient()
+        await client.login(email=os.getenv("BITWARDEN_EMAIL"), password=os.getenv("BITWARDEN_PASSWORD"))
+        item = await client.get_item("cloudcommerce-keys")
+        value = item.fields[name].value
+        _secret_cache[name] = (value, time.monotonic() + SECRET_TTL)
+        return value
 
 # LlamaIndex for RAG
-embed_model = OpenAIEmbedding(model="text-embedding-3-small", api_key=get_secret("OPENAI"))
-index = VectorStoreIndex.from_documents([])  # Load from Supabase
+_embed_model = None
+
+async def get_embed_model():
+    global _embed_model
+    if _embed_model is None:
+        _embed_model = OpenAIEmbedding(model="text-embedding-3-small", api_key=await get_secret("OPENAI"))
+    return _embed_model
+
+# Index is loaded once per process on first use, from persisted storage when available
+LLAMA_INDEX_PERSIST_DIR = os.getenv("LLAMA_INDEX_PERSIST_DIR", "/var/lib/cc/llama_index")
+_index = None
+_retriever = None
+_index_lock = threading.Lock()
+
+def get_index(embed_model=None):
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if os.path.isdir(LLAMA_INDEX_PERSIST_DIR):
+                    storage_context = StorageContext.from_defaults(persist_dir=LLAMA_INDEX_PERSIST_DIR)
+                    _index = load_index_from_storage(storage_context, embed_model=embed_model)
+                else:
+                    _index = VectorStoreIndex.from_documents([], embed_model=embed_model)  # Load from Supabase
+    return _index
+
+def get_retriever(embed_model=None):
+    global _retriever
+    if _retriever is None:
+        _retriever = get_index(embed_model).as_retriever()
+    return _retriever
 
 class InputData(BaseModel):
     images: list[str]
@@ -38,24 +86,28 @@ class InputData(BaseModel):
     category: str = None
     condition: str = None
 
+async def generate_rag_listing(summary: str, api_key: str):
+    # LlamaIndex RAG for semantic comps (index loading and retrieval are sync, keep them off the event loop)
+    retriever = await asyncio.to_thread(get_retriever, await get_embed_model())
+    comps = await asyncio.to_thread(retriever.retrieve, summary)
+    rag_prompt = f"Based on comps {comps}, generate listing for {summary}."
+    return await acompletion(model="openrouter/llama-3.1-8b-instruct", messages=[{"role": "user", "content": rag_prompt}], api_key=api_key)
+
 @app.post("/submit")
 async def submit_item(request: Request, data: dict):
     with sentry_sdk.start_span(op="llm.chain"):
-        # LiteLLM for OpenRouter
+        # LiteLLM for OpenRouter; vision analysis and RAG are independent, so run them together
         openrouter_key = await get_secret("OPENROUTER")
-        response = completion(
-            model="openrouter/llava-13b-v1.6",
-            messages=[{"role": "user", "content": data["prompt"]}],
-            api_key=openrouter_key,
-            temperature=0.7
+        response, rag_response = await asyncio.gather(
+            acompletion(
+                model="openrouter/llava-13b-v1.6",
+                messages=[{"role": "user", "content": data["prompt"]}],
+                api_key=openrouter_key,
+                temperature=0.7
+            ),
+            generate_rag_listing(data["summary"], openrouter_key)
         )
 
-        # LlamaIndex RAG for semantic comps
-        retriever = index.as_retriever()
-        comps = retriever.retrieve(data["summary"])
-        rag_prompt = f"Based on comps {comps}, generate listing for {data['summary']}."
-        rag_response = completion(model="openrouter/llama-3.1-8b-instruct", messages=[{"role": "user", "content": rag_prompt}], api_key=openrouter_key)
-
         sentry_sdk.start_span(op="db.insert")  # Trace DB
         # Supabase insert...
 
@@ -69,6 +121,7 @@ async def rotate_secrets():
         await client.login(email=os.getenv("BITWARDEN_EMAIL"), password=os.getenv("BITWARDEN_PASSWORD"))
         new_key = os.urandom(32).hex()
         await client.set_item("cloudcommerce-keys", {"OPENROUTER": new_key})
+        _secret_cache.clear()
         # Update services (e.g., env restart)
         sentry_sdk.capture_message("Secrets rotated", level="info")
     return {"status": "rotated"}
@@ -0,0 +1,210 @@
+
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, AsyncMock
+
+# Since the file to be tested is in a different directory, we need to add the parent directory to the path
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.training import model_trainer
+
+# Purely numeric rules, so the modifier compiles to a rule table as well as closures
+NUMERIC_RULES = [
+    {"condition": {"field": "price", "operator": "equals", "value": 10}, "action": {"type": "multiply", "factor": 1.5}},
+    {"condition": {"field": "rating", "operator": "greater_than", "value": "3.5"}, "action": {"type": "add", "value": 0.1}},
+    {"condition": {"field": "price", "operator": "less_than", "value": 5}, "action": {"type": "set", "value": 0.2}},
+    {"condition": {"field": "stock", "operator": "equals", "value": 0}, "action": {"type": "multiply", "factor": 0.5}},
+    {"condition": {"field": "rating", "operator": "greater_than", "value": 4.5}, "action": {"type": "multiply", "factor": 1.1}},
+]
+
+# Text rules keep the modifier on the closure path
+TEXT_RULES = NUMERIC_RULES + [
+    {"condition": {"field": "title", "operator": "contains", "value": "vintage"}, "action": {"type": "add", "value": 0.05}},
+    {"condition": {"field": "brand", "operator": "in", "value": ["acme", "globex"]}, "action": {"type": "multiply", "factor": 0.9}},
+]
+
+# Numeric, numeric-string, non-numeric, None, unhashable and missing field values
+ITEMS = [
+    {"price": 10, "rating": 4.8, "stock": 0, "title": "Vintage lamp", "brand": "acme"},
+    {"price": 10.0, "rating": "4", "stock": "0", "title": "vintage chair", "brand": "initech"},
+    {"price": "10", "rating": None, "stock": False, "title": None, "brand": None},
+    {"price": None, "rating": "high", "stock": 3, "title": 42, "brand": ["acme"]},
+    {"price": "4", "rating": [1, 2], "title": "lamp"},
+    {"price": 3, "rating": "4.9", "stock": 0.0, "brand": "globex"},
+    {"price": float("nan"), "rating": float("inf"), "stock": None},
+    {"price": "abc", "stock": "none"},
+    {},
+]
+
+class CappedQuery:
+    """Query stub that, like PostgREST max_rows, returns at most max_rows rows per request"""
+
+    def __init__(self, rows, max_rows):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.start, self.end = 0, len(rows) - 1
+
+    def __getattr__(self, name):
+        # select/gt/neq/gte/order just return the query
+        return lambda *args, **kwargs: self
+
+    def range(self, start, end):
+        self.start, self.end = start, end
+        return self
+
+    async def execute(self):
+        end = min(self.end + 1, self.start + self.max_rows)
+        return MagicMock(data=self.rows[self.start:end])
+
+@pytest.fixture
+def trainer():
+    return model_trainer.ModelTrainer(MagicMock(), MagicMock())
+
+def make_rule_modifier(trainer, rules):
+    now = datetime.now()
+    modifier = model_trainer.QualityModifier(
+        id="rules",
+        name="Rules",
+        description="Rule-based test modifier",
+        model_version="1.0.0",
+        modifier_type="rule_based",
+        parameters={"rules": rules},
+        confidence_threshold=0.0,
+        quality_improvement=0.0,
+        created_at=now,
+        updated_at=now
+    )
+    trainer._validate_modifier_parameters(modifier.modifier_type, modifier.parameters)
+    trainer._compile_modifier(modifier)
+    return modifier
+
+def test_rule_table_kernels_match_compiled_rules(trainer):
+    modifier = make_rule_modifier(trainer, NUMERIC_RULES)
+    table = modifier._rule_table
+    assert table is not None
+
+    qualities = np.linspace(0.1, 0.9, len(ITEMS))
+    expected = np.array([trainer._apply_rule_based_modifier(modifier, q, item) for q, item in zip(qualities, ITEMS)])
+
+    field_values = trainer._encode_rule_fields(ITEMS, table.fields)
+    rule_arrays = (table.op_codes, table.action_codes, table.field_ids, table.condition_values, table.action_values)
+
+    np.testing.assert_allclose(model_trainer._apply_rule_table_jit(qualities, field_values, *rule_arrays), expected)
+    np.testing.assert_allclose(model_trainer._apply_rule_table_vectorized(qualities, field_values, *rule_arrays), expected)
+    np.testing.assert_allclose(trainer._apply_rule_based_modifier_batch(modifier, qualities, ITEMS), expected)
+
+def test_text_rules_fall_back_to_compiled_rules(trainer):
+    modifier = make_rule_modifier(trainer, TEXT_RULES)
+    assert modifier._rule_table is None
+
+    qualities = np.linspace(0.1, 0.9, len(ITEMS))
+    expected = np.array([trainer._apply_rule_based_modifier(modifier, q, item) for q, item in zip(qualities, ITEMS)])
+
+    np.testing.assert_allclose(trainer._apply_rule_based_modifier_batch(modifier, qualities, ITEMS), expected)
+
+@pytest.mark.asyncio
+async def test_training_data_paging_survives_server_row_cap(trainer):
+    rows = [{"id": i, "quality_score": 0.5} for i in range(3000)]
+    trainer.supabase.from_.side_effect = lambda table: CappedQuery(rows, max_rows=1000)
+    config = trainer.default_configs[model_trainer.ModelType.QUALITY_PREDICTOR]
+
+    loaded = []
+    async for page in trainer._iter_training_data(config, page_size=5000):
+        loaded.extend(page)
+
+    assert [row["id"] for row in loaded] == list(range(3000))
+
+@pytest.mark.asyncio
+async def test_train_model_creates_pending_job(trainer):
+    trainer._train_model_async = AsyncMock()
+
+    job = await trainer.train_model(model_trainer.ModelType.QUALITY_PREDICTOR, user_id="user-1")
+
+    assert job.status == model_trainer.TrainingStatus.PENDING
+    assert job.started_at is None and job.metrics is None
+    assert trainer.training_jobs[job.id] is job
+    assert await trainer.get_training_jobs(user_id="user-1") == [job]
+
+@pytest.mark.asyncio
+async def test_retrain_models_raises_when_no_job_starts(trainer):
+    trainer._train_model_async = AsyncMock()
+
+    jobs = await trainer.retrain_models([model_trainer.ModelType.QUALITY_PREDICTOR, model_trainer.ModelType.PRICE_PREDICTOR])
+    assert [job.model_type for job in jobs] == [model_trainer.ModelType.QUALITY_PREDICTOR, model_trainer.ModelType.PRICE_PREDICTOR]
+
+    trainer.train_model = AsyncMock(side_effect=RuntimeError("no config"))
+    with pytest.raises(RuntimeError):
+        await trainer.retrain_models([model_trainer.ModelType.QUALITY_PREDICTOR])
+
+def finish_job(trainer, job_id, status, completed_at, metrics):
+    config = trainer.default_configs[model_trainer.ModelType.CATEGORY_CLASSIFIER]
+    job = model_trainer.TrainingJob(
+        id=job_id,
+        model_type=config.model_type,
+        config=config,
+        status=status,
+        created_at=completed_at,
+        started_at=completed_at,
+        completed_at=completed_at,
+        metrics=metrics,
+        model_path=None,
+        error_message=None,
+        user_id=None,
+        dataset_info={}
+    )
+    trainer.training_jobs[job_id] = job
+    trainer._index_finished_job(job_id, job)
+    return job
+
+@pytest.mark.asyncio
+async def test_model_performance_aggregates_completed_jobs(trainer):
+    now = datetime.now()
+    completed = model_trainer.TrainingStatus.COMPLETED
+
+    # Metrics as _run_training_job combines them, validation keys included
+    finish_job(trainer, "a", completed, now - timedelta(days=2), model_trainer.TrainingMetrics(
+        accuracy=0.8, precision=0.7, training_time=2.0, validation_accuracy=0.75, prediction_time=0.1, model_size=1024
+    ))
+    best = finish_job(trainer, "b", completed, now - timedelta(days=1), model_trainer.TrainingMetrics(accuracy=0.9, training_time=4.0))
+    finish_job(trainer, "old", completed, now - timedelta(days=60), model_trainer.TrainingMetrics(accuracy=0.99, training_time=1.0))
+    finish_job(trainer, "failed", model_trainer.TrainingStatus.FAILED, now, None)
+
+    performance = await trainer.get_model_performance(model_trainer.ModelType.CATEGORY_CLASSIFIER, days=30)
+
+    assert performance["total_jobs"] == 2
+    assert performance["average_accuracy"] == pytest.approx(0.85)
+    assert performance["average_precision"] == pytest.approx(0.7)
+    assert performance["average_training_time"] == pytest.approx(3.0)
+    assert np.isnan(performance["average_rmse"])
+    assert performance["best_job"] is best
+
+def test_modifier_filters_match_none_like_membership(trainer):
+    now = datetime.now()
+    modifier = model_trainer.QualityModifier(
+        id="filters",
+        name="Filters",
+        description="Filtered additive test modifier",
+        model_version="1.0.0",
+        modifier_type="additive",
+        parameters={"value": 0.1, "categories": ["shoes", None], "brands": ["acme", None], "price_range": [0, 50]},
+        confidence_threshold=0.0,
+        quality_improvement=0.0,
+        created_at=now,
+        updated_at=now
+    )
+    items = [
+        {"category": "shoes", "brand": "acme", "price": 10},
+        {"category": None, "price": 10},
+        {},
+        {"category": "lamps", "brand": "acme", "price": 10},
+        {"category": ["shoes"], "brand": "acme", "price": 10},
+        {"category": "shoes", "brand": "acme", "price": "10"},
+        {"category": "shoes", "brand": "acme", "price": 60},
+    ]
+
+    result = trainer.apply_modifiers_batch(np.full(len(items), 0.5), items, modifiers=[modifier])
+
+    np.testing.assert_allclose(result, [0.6, 0.6, 0.6, 0.5, 0.5, 0.5, 0.5])
@@ -1,6 +1,5 @@
 
 import pytest
-import asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
 
 # Since the file to be tested is in a different directory, we need to add the parent directory to the path
@@ -10,12 +9,40 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from core.agents import submit_agent
 
+# Shape of the Letta agent used by process_submission, built once for spec'd mocks
+_AGENT_SPEC = type("AgentSpec", (), {"messages": type("Messages", (), {"create": None})()})
+
+@pytest.fixture(scope="module")
+def patched_agent_deps():
+    """Patch submit_agent's external dependencies once for all tests in this module"""
+    # listing_chain is built inside process_submission as prompt | ChatOpenAI(...) | parser
+    listing_chain = MagicMock(ainvoke=AsyncMock())
+    listing_prompt = MagicMock()
+    listing_prompt.__or__.return_value.__or__.return_value = listing_chain
+
+    mocks = {
+        "scrape_sites": AsyncMock(),
+        "chain": MagicMock(ainvoke=AsyncMock()),
+        "letta": MagicMock(),
+        "ChatOpenAI": MagicMock(),
+        "ChatPromptTemplate": MagicMock(from_template=MagicMock(return_value=listing_prompt)),
+    }
+    with patch.multiple("core.agents.submit_agent", **mocks):
+        yield {**mocks, "listing_chain": listing_chain}
+
+@pytest.fixture
+def agent_deps(patched_agent_deps):
+    # Clear call history left by earlier tests; each test sets its own return values
+    for mock in patched_agent_deps.values():
+        mock.reset_mock()
+    return patched_agent_deps
+
 @pytest.mark.asyncio
-@patch('core.agents.submit_agent.scrape_sites', new_callable=AsyncMock)
-@patch('core.agents.submit_agent.chain.ainvoke', new_callable=AsyncMock)
-@patch('core.agents.submit_agent.listing_chain.ainvoke', new_callable=AsyncMock)
-@patch('core.agents.submit_agent.letta.agents.get')
-async def test_process_submission_success(mock_letta_get, mock_listing_chain, mock_analysis_chain, mock_scrape_sites):
+async def test_process_submission_success(agent_deps):
+    mock_scrape_sites = agent_deps["scrape_sites"]
+    mock_analysis_chain = agent_deps["chain"].ainvoke
+    mock_listing_chain = agent_deps["listing_chain"].ainvoke
+
     # Arrange: Set up the mock return values
     mock_scrape_sites.return_value = {
         "similar": [("Fake Item 1", "$10.00"), ("Fake Item 2", "$12.00")],
@@ -26,9 +53,9 @@ async def test_process_submission_success(mock_letta_get, mock_listing_chain, mo
     mock_listing_chain.return_value = "{'ebay': 'mock listing'}"
 
     # Mock the Letta agent and its methods
-    mock_agent = MagicMock()
+    mock_agent = MagicMock(spec=_AGENT_SPEC)
     mock_agent.messages.create = AsyncMock()
-    mock_letta_get.return_value = mock_agent
+    agent_deps["letta"].agents.get.return_value = mock_agent
 
     # Act: Call the function with test data
     result = await submit_agent.process_submission(
@@ -48,4 +75,4 @@ async def test_process_submission_success(mock_letta_get, mock_listing_chain, mo
     assert result["listings"] == "{'ebay': 'mock listing'}"
     assert result["price"] == 11.00
     assert "Platform,Title,Desc,Price,Condition" in result["csv"]
-    assert "ebay,AI Item,Generated desc,11.0,New" in result["csv"]
+    assert 'ebay,"AI Item","Generated desc",11.0,"New"' in result["csv"]